@@ -5,7 +5,9 @@ import os
 import PyPDF2 as pdf
 import json
 import re
+import uuid
 from dotenv import load_dotenv
+from prompt_cache import PrefixCache
 
 # Load environment variables
 load_dotenv()
@@ -28,43 +30,48 @@ def input_pdf_text(uploaded_file):
         st.error(f"Error reading PDF: {e}")
         return ""
 
-def get_gemini_response(input_text, jd):
-    """Calls the Gemini API for ATS evaluation."""
+MODEL_NAME = 'gemini-2.0-pro-exp-02-05'
+
+# Stable prefix (instructions + JD + schema) shared by every resume scored against the same JD.
+ATS_PREFIX_TEMPLATE = """
+Hey, act as a professional ATS (Application Tracking System) with deep expertise in software engineering and data science.
+Evaluate the resume against the job description and provide an ATS evaluation strictly in JSON format.
+
+Job Description: {jd}
+
+You MUST respond **only** in JSON format with NO extra text. The JSON format is:
+
+{{
+    "JD Match": "XX%",
+    "MissingKeywords": ["keyword1", "keyword2"],
+    "Strengths": "Your strengths here.",
+    "Areas for Improvement": "Your improvement areas here.",
+    "SuggestedSkills": ["skill1", "skill2"],
+    "FormattingRecommendations": "Your formatting suggestions here.",
+    "ProfileSummary": "Your profile summary here.",
+    "CertificateRecommendations": ["certificate1", "certificate2"]
+}}
+"""
+
+# Variable suffix, the only part sent fresh for each resume.
+ATS_SUFFIX_TEMPLATE = """
+Resume: {resume}
+"""
+
+@st.cache_resource
+def get_prompt_cache():
+    """Process-wide prefix cache so repeated scoring against one JD reuses the cached prompt."""
+    return PrefixCache(MODEL_NAME)
+
+def get_gemini_response(input_text, ats_prefix, cache=None, batch=None):
+    """Calls the Gemini API for ATS evaluation; `ats_prefix` is ATS_PREFIX_TEMPLATE filled with the JD."""
     try:
-        models = genai.list_models()  # Placeholder function to list models
-        # Assuming you can list models
-        # available_models = genai.list_models()  # Example function to list models
-        # available_model_names = [model.name for model in available_models]
-        # st.write(f"Available models: {available_model_names}")
-
-        # model_names = [model.name for model in models]
-        # if 'gemini' not in model_names:
-        #     raise ValueError("gemini-pro model is not available.")
-        
-        model = genai.GenerativeModel('gemini-2.0-pro-exp-02-05')
-
-        formatted_prompt = f"""
-        Hey, act as a professional ATS (Application Tracking System) with deep expertise in software engineering and data science.
-        Evaluate the resume against the job description and provide an ATS evaluation strictly in JSON format.
-
-        Resume: {input_text}
-        Job Description: {jd}
-
-        You MUST respond **only** in JSON format with NO extra text. The JSON format is:
-
-        {{
-            "JD Match": "XX%",
-            "MissingKeywords": ["keyword1", "keyword2"],
-            "Strengths": "Your strengths here.",
-            "Areas for Improvement": "Your improvement areas here.",
-            "SuggestedSkills": ["skill1", "skill2"],
-            "FormattingRecommendations": "Your formatting suggestions here.",
-            "ProfileSummary": "Your profile summary here.",
-            "CertificateRecommendations": ["certificate1", "certificate2"]
-        }}
-        """
-
-        response = model.generate_content(formatted_prompt)
+        cache = cache or get_prompt_cache()
+        response = cache.generate(
+            ats_prefix,
+            ATS_SUFFIX_TEMPLATE.format(resume=input_text),
+            batch=batch,
+        )
 
         if not response or not response.text:
             st.error("Error: Empty response from API.")
@@ -125,11 +132,21 @@ def ats_page():
                 st.error("Error extracting text from PDF. Please upload a valid document.")
                 return
 
-            response = get_gemini_response(text, jd)
+            # Token savings are tracked per browser session and JD
+            batch = st.session_state.setdefault("ats_batch_id", uuid.uuid4().hex)
+            ats_prefix = ATS_PREFIX_TEMPLATE.format(jd=jd)
+            response = get_gemini_response(text, ats_prefix, batch=batch)
             if not response:
                 st.error("Failed to fetch or parse response from Gemini API.")
                 return
 
+            usage = get_prompt_cache().usage(ats_prefix, batch=batch)
+            st.caption(
+                f"Prompt cache for this JD in this session: {usage.requests} evaluations, "
+                f"{usage.cached_tokens} cached / {usage.fresh_tokens} fresh input tokens "
+                "(shorter JDs are only cached implicitly by Gemini)"
+            )
+
             # Result Display
             st.markdown('<div class="result-container">', unsafe_allow_html=True)
 
@@ -0,0 +1,227 @@
+import atexit
+import datetime
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import google.generativeai as genai
+from google.api_core import exceptions as api_exceptions
+from google.generativeai import caching
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = datetime.timedelta(minutes=30)
+# Entries are dropped locally this long before the provider expires them.
+EXPIRY_MARGIN = datetime.timedelta(minutes=1)
+# Smallest prefix Gemini 2.x accepts for explicit context caching.
+MIN_CACHE_TOKENS = 4096
+# English text averages ~4 characters per token, so a prefix under
+# MIN_CACHE_TOKENS * MIN_CHARS_PER_TOKEN characters is assumed too small and sent in full
+# without a count_tokens round trip. A typical JD-sized ATS prefix falls in this range.
+MIN_CHARS_PER_TOKEN = 3
+MAX_BATCHES = 256
+
+# Provider answers meaning "this prefix can't be cached here", as opposed to transient failures.
+_UNCACHEABLE_ERRORS = (api_exceptions.InvalidArgument, api_exceptions.MethodNotImplemented)
+
+
+@dataclass
+class TokenUsage:
+    """Input-token accounting for one batch of requests sharing a prompt prefix."""
+    requests: int = 0
+    cached_tokens: int = 0
+    fresh_tokens: int = 0
+
+    def record(self, cached, fresh):
+        self.requests += 1
+        self.cached_tokens += cached
+        self.fresh_tokens += fresh
+
+
+@dataclass
+class _Entry:
+    model: object
+    expires: datetime.datetime
+    cached: object = None
+
+
+def _prefix_key(model_name, prefix):
+    return hashlib.sha256(f"{model_name}\n{prefix}".encode("utf-8")).hexdigest()
+
+
+class _PrefixedModel:
+    """Fallback when a prefix can't be cached: sends prefix + suffix every time."""
+
+    def __init__(self, model, prefix):
+        self._model = model
+        self._prefix = prefix
+
+    def generate_content(self, suffix):
+        return self._model.generate_content(self._prefix + suffix)
+
+
+class PrefixCache:
+    """Reuses a stable prompt prefix across requests through Gemini context caching.
+
+    Each distinct prefix is uploaded once as cached content and later requests only send
+    the variable suffix. Prefixes below MIN_CACHE_TOKENS, which includes most single JDs,
+    are sent in full and only benefit from the provider's implicit caching. Either way,
+    input tokens are tallied per batch and prefix from the response usage metadata, so
+    the reported savings are what the provider actually served from cache.
+    """
+
+    def __init__(self, model_name, ttl=DEFAULT_TTL):
+        self.model_name = model_name
+        self.ttl = ttl
+        self._models = {}
+        self._binding = {}
+        self._usage = OrderedDict()
+        # Guards the dicts only; provider calls are always made outside it.
+        self._lock = threading.Lock()
+        atexit.register(self.close)
+
+    def generate(self, prefix, suffix, batch=None):
+        key = _prefix_key(self.model_name, prefix)
+        entry = self._entry(key, prefix)
+
+        try:
+            response = entry.model.generate_content(suffix)
+        except Exception:
+            # The cached content may be gone on the provider side; rebind on the next call.
+            with self._lock:
+                dropped = [self._models.pop(key)] if self._models.get(key) is entry else []
+            _delete(dropped)
+            raise
+
+        self._record(self._usage_key(key, batch), response)
+        return response
+
+    def usage(self, prefix, batch=None):
+        """Returns the TokenUsage recorded for `prefix` within `batch` (empty if none)."""
+        key = self._usage_key(_prefix_key(self.model_name, prefix), batch)
+        with self._lock:
+            return self._usage.get(key, TokenUsage())
+
+    def close(self):
+        """Deletes every cached content still held, so it stops being billed."""
+        with self._lock:
+            dropped, self._models = list(self._models.values()), {}
+        _delete(dropped)
+
+    def _entry(self, key, prefix):
+        """Returns the live entry for `key`, binding it once even under concurrent callers."""
+        while True:
+            with self._lock:
+                expired = self._pop_expired()
+                entry = self._models.get(key)
+                binding = self._binding.get(key)
+                owner = entry is None and binding is None
+                if owner:
+                    binding = self._binding[key] = threading.Event()
+            _delete(expired)
+            if entry is not None:
+                return entry
+            if not owner:
+                # Another session is binding this prefix; use its result (or retry if it failed).
+                binding.wait()
+                continue
+
+            try:
+                expires = datetime.datetime.now() + self.ttl - EXPIRY_MARGIN
+                model, cached = self._bind(prefix)
+                entry = _Entry(model, expires, cached)
+                with self._lock:
+                    self._models[key] = entry
+                return entry
+            finally:
+                with self._lock:
+                    del self._binding[key]
+                binding.set()
+
+    def _bind(self, prefix):
+        model = genai.GenerativeModel(self.model_name)
+        if len(prefix) < MIN_CACHE_TOKENS * MIN_CHARS_PER_TOKEN:
+            return _PrefixedModel(model, prefix), None
+        if model.count_tokens(prefix).total_tokens < MIN_CACHE_TOKENS:
+            return _PrefixedModel(model, prefix), None
+        try:
+            cached = caching.CachedContent.create(
+                model=self.model_name,
+                contents=[prefix],
+                ttl=self.ttl,
+            )
+        except _UNCACHEABLE_ERRORS as e:
+            logger.info("Prefix not cacheable, sending it in full: %s", e)
+            return _PrefixedModel(model, prefix), None
+        return genai.GenerativeModel.from_cached_content(cached_content=cached), cached
+
+    def _pop_expired(self):
+        now = datetime.datetime.now()
+        expired = [key for key, entry in self._models.items() if entry.expires <= now]
+        return [self._models.pop(key) for key in expired]
+
+    @staticmethod
+    def _usage_key(key, batch):
+        return key if batch is None else (batch, key)
+
+    def _record(self, key, response):
+        metadata = getattr(response, "usage_metadata", None)
+        prompt_tokens = getattr(metadata, "prompt_token_count", 0) or 0
+        cached_tokens = getattr(metadata, "cached_content_token_count", 0) or 0
+        with self._lock:
+            usage = self._usage.pop(key, None) or TokenUsage()
+            usage.record(cached_tokens, prompt_tokens - cached_tokens)
+            self._usage[key] = usage
+            while len(self._usage) > MAX_BATCHES:
+                self._usage.popitem(last=False)
+
+
+def _delete(entries):
+    for entry in entries:
+        if entry.cached is not None:
+            try:
+                entry.cached.delete()
+            except Exception as e:
+                logger.warning("Could not delete cached content: %s", e)
+
+
+class _LocalUsage:
+    def __init__(self, prompt_token_count, cached_content_token_count):
+        self.prompt_token_count = prompt_token_count
+        self.cached_content_token_count = cached_content_token_count
+
+
+class _LocalModel:
+    """Stand-in for a cached-content model: reports the prefix as cached after its first use."""
+
+    def __init__(self, generate, prefix):
+        self._generate = generate
+        self._prefix = prefix
+        self._warm = False
+
+    def generate_content(self, suffix):
+        response = self._generate(self._prefix, suffix)
+        prefix_tokens = _estimate_tokens(self._prefix)
+        response.usage_metadata = _LocalUsage(
+            prefix_tokens + _estimate_tokens(suffix),
+            prefix_tokens if self._warm else 0,
+        )
+        self._warm = True
+        return response
+
+
+def _estimate_tokens(text):
+    return len(text.split())
+
+
+class LocalPrefixCache(PrefixCache):
+    """Offline PrefixCache for tests: `generate(prefix, suffix)` replaces the Gemini call."""
+
+    def __init__(self, generate, model_name="local", ttl=DEFAULT_TTL):
+        super().__init__(model_name, ttl)
+        self._generate = generate
+
+    def _bind(self, prefix):
+        return _LocalModel(self._generate, prefix), None
@@ -0,0 +1,241 @@
+import atexit
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import uuid
+import zlib
+from collections import OrderedDict
+
+import streamlit as st
+
+logger = logging.getLogger(__name__)
+
+# Interview progress that must survive a worker restart or a hop to another replica.
+PERSISTED_KEYS = (
+    "interview_started",
+    "total_questions",
+    "current_question_number",
+    "current_question",
+    "ideal_answer",
+    "job_role",
+    "company_name",
+    "responses",
+    "questions",
+    "hr_questions",
+)
+
+SESSION_PARAM = "sid"
+COMPRESS_THRESHOLD = 512  # bytes; smaller payloads are stored as plain JSON
+_RAW, _ZLIB = b"j", b"z"
+MAX_TRACKED_SESSIONS = 10000  # digests kept for write dedup; older sessions just rewrite once
+
+
+def serialize(state):
+    """Compact JSON, zlib-compressed once the payload is large enough to benefit."""
+    data = json.dumps(state, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    if len(data) >= COMPRESS_THRESHOLD:
+        return _ZLIB + zlib.compress(data)
+    return _RAW + data
+
+
+def deserialize(blob):
+    marker, data = blob[:1], blob[1:]
+    if marker == _ZLIB:
+        data = zlib.decompress(data)
+    return json.loads(data.decode("utf-8"))
+
+
+class SQLiteBackend:
+    """Session blobs in a SQLite file, shareable by every worker process on the host.
+
+    Reads use their own connection so, under WAL, a restore never queues behind a flush
+    waiting on another worker's write lock.
+    """
+
+    def __init__(self, path, write_timeout=5.0, read_timeout=0.5):
+        self._write_lock = threading.Lock()
+        self._read_lock = threading.Lock()
+        self._write = sqlite3.connect(path, timeout=write_timeout, check_same_thread=False, isolation_level=None)
+        self._write.execute("PRAGMA journal_mode=WAL")
+        self._write.execute("CREATE TABLE IF NOT EXISTS sessions (sid TEXT PRIMARY KEY, state BLOB NOT NULL)")
+        if path == ":memory:":
+            # Each in-memory connection is a separate database; nothing else can lock it anyway.
+            self._read = self._write
+        else:
+            self._read = sqlite3.connect(path, timeout=read_timeout, check_same_thread=False, isolation_level=None)
+
+    def get(self, sid):
+        with self._read_lock:
+            row = self._read.execute("SELECT state FROM sessions WHERE sid = ?", (sid,)).fetchone()
+        return row[0] if row else None
+
+    def set_many(self, items):
+        with self._write_lock:
+            try:
+                self._write.execute("BEGIN IMMEDIATE")
+                self._write.executemany("INSERT OR REPLACE INTO sessions (sid, state) VALUES (?, ?)", items.items())
+                self._write.execute("COMMIT")
+            except Exception:
+                # Leave the connection usable for the retry on the next flush.
+                if self._write.in_transaction:
+                    self._write.execute("ROLLBACK")
+                raise
+
+
+class LocalRedis:
+    """In-process stand-in implementing the subset of the redis-py client used here."""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            return self._data.get(key)
+
+    def mset(self, mapping):
+        with self._lock:
+            self._data.update(mapping)
+        return True
+
+
+class RedisBackend:
+    """Session blobs in Redis (or any client exposing `get` and `mset`)."""
+
+    def __init__(self, client, prefix="session:"):
+        self._client = client
+        self._prefix = prefix
+
+    def get(self, sid):
+        return self._client.get(self._prefix + sid)
+
+    def set_many(self, items):
+        self._client.mset({self._prefix + sid: blob for sid, blob in items.items()})
+
+
+class SessionStore:
+    """Write-behind session persistence.
+
+    `save` only queues a snapshot when its digest differs from the last one seen for that
+    session; a background thread flushes queued snapshots to the backend in a single batch
+    every `flush_interval` seconds, so reruns never wait on storage. Failed batches are
+    requeued and retried on the next flush.
+    """
+
+    def __init__(self, backend, flush_interval=0.5):
+        self.backend = backend
+        self.flush_interval = flush_interval
+        self._pending = {}
+        self._digests = OrderedDict()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        threading.Thread(target=self._run, daemon=True).start()
+        atexit.register(self.flush)
+
+    def load(self, sid):
+        with self._lock:
+            blob = self._pending.get(sid)
+        if blob is None:
+            blob = self.backend.get(sid)
+        if blob is None:
+            return {}
+        with self._lock:
+            self._remember(sid, blob)
+        return deserialize(blob)
+
+    def save(self, sid, state):
+        blob = serialize(state)
+        with self._lock:
+            if self._digests.get(sid) == _digest(blob):
+                self._digests.move_to_end(sid)
+                return
+            self._remember(sid, blob)
+            self._pending[sid] = blob
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        try:
+            self.backend.set_many(pending)
+        except Exception:
+            with self._lock:
+                for sid, blob in pending.items():
+                    # A newer snapshot queued meanwhile supersedes the failed one.
+                    self._pending.setdefault(sid, blob)
+                    self._digests.pop(sid, None)
+            raise
+
+    def _remember(self, sid, blob):
+        self._digests[sid] = _digest(blob)
+        self._digests.move_to_end(sid)
+        while len(self._digests) > MAX_TRACKED_SESSIONS:
+            self._digests.popitem(last=False)
+
+    def _run(self):
+        while not self._wake.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Session flush failed; will retry")
+
+
+def _digest(blob):
+    return hashlib.blake2b(blob, digest_size=16).digest()
+
+
+def _make_backend():
+    backend = os.getenv("SESSION_BACKEND", "sqlite").lower()
+    if backend == "redis":
+        import redis  # Optional dependency, only needed for a shared Redis server
+
+        timeout = float(os.getenv("REDIS_TIMEOUT", "0.5"))  # restore reads block the rerun
+        client = redis.Redis.from_url(
+            os.getenv("REDIS_URL", "redis://localhost:6379/0"),
+            socket_timeout=timeout,
+            socket_connect_timeout=timeout,
+        )
+        return RedisBackend(client)
+    if backend == "memory":
+        return RedisBackend(LocalRedis())
+    return SQLiteBackend(os.getenv("SESSION_DB_PATH", "sessions.db"))
+
+
+@st.cache_resource
+def get_session_store():
+    """Process-wide store, configured through SESSION_BACKEND / SESSION_DB_PATH / REDIS_URL."""
+    return SessionStore(_make_backend(), float(os.getenv("SESSION_FLUSH_INTERVAL", "0.5")))
+
+
+def _session_id():
+    sid = st.query_params.get(SESSION_PARAM)
+    if not sid:
+        sid = uuid.uuid4().hex
+        st.query_params[SESSION_PARAM] = sid
+    return sid
+
+
+def restore_session():
+    """Loads persisted interview progress into a fresh `st.session_state`."""
+    if st.session_state.get("_session_restored"):
+        return
+    try:
+        for key, value in get_session_store().load(_session_id()).items():
+            st.session_state.setdefault(key, value)
+    except Exception:
+        # Storage trouble must not break the pages; the session just starts fresh.
+        logger.exception("Could not restore session state")
+    st.session_state._session_restored = True
+
+
+def persist_session():
+    """Queues the current interview progress for write-behind persistence."""
+    try:
+        state = {key: st.session_state[key] for key in PERSISTED_KEYS if key in st.session_state}
+        get_session_store().save(_session_id(), state)
+    except Exception:
+        logger.exception("Could not persist session state")
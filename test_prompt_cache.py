@@ -0,0 +1,186 @@
+import datetime
+import os
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from google.api_core import exceptions as api_exceptions
+
+os.environ.setdefault("GOOGLE_API_KEY", "test-key")
+
+import prompt_cache
+from ats_evaluation import ATS_PREFIX_TEMPLATE, get_gemini_response
+from prompt_cache import LocalPrefixCache, PrefixCache
+
+JD = "Senior Python engineer with Streamlit experience"
+RESUME = "Jane Doe, five years of Python and Streamlit"
+
+
+def fake_gemini(calls):
+    def generate(prefix, suffix):
+        calls.append((prefix, suffix))
+        return SimpleNamespace(text='{"JD Match": "80%"}')
+    return generate
+
+
+def test_second_evaluation_reuses_cached_prefix():
+    calls = []
+    cache = LocalPrefixCache(fake_gemini(calls))
+    ats_prefix = ATS_PREFIX_TEMPLATE.format(jd=JD)
+
+    assert get_gemini_response(RESUME, ats_prefix, cache=cache, batch="s1") == {"JD Match": "80%"}
+    get_gemini_response(RESUME, ats_prefix, cache=cache, batch="s1")
+
+    prefix_tokens = len(ats_prefix.split())
+    usage = cache.usage(ats_prefix, batch="s1")
+    assert usage.requests == 2
+    assert usage.cached_tokens == prefix_tokens
+    assert usage.fresh_tokens == prefix_tokens + 2 * (len(RESUME.split()) + 1)
+
+    for prefix, suffix in calls:
+        assert JD in prefix and RESUME not in prefix
+        assert RESUME in suffix and JD not in suffix
+
+
+def test_usage_is_read_only_and_per_batch():
+    cache = LocalPrefixCache(fake_gemini([]))
+    cache.generate("prefix ", "suffix", batch="s1")
+
+    assert cache.usage("prefix ", batch="s2").requests == 0
+    assert ("s2", prompt_cache._prefix_key("local", "prefix ")) not in cache._usage
+
+
+def test_failed_call_drops_entry():
+    cache = LocalPrefixCache(fake_gemini([]))
+    cache.generate("prefix ", "suffix")
+    key = prompt_cache._prefix_key("local", "prefix ")
+
+    def broken(suffix):
+        raise RuntimeError("cached content not found")
+    cache._models[key].model.generate_content = broken
+
+    with pytest.raises(RuntimeError):
+        cache.generate("prefix ", "suffix")
+    assert key not in cache._models
+
+
+LONG_PREFIX = "x" * (prompt_cache.MIN_CACHE_TOKENS * prompt_cache.MIN_CHARS_PER_TOKEN)
+
+
+class FakeModel:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.counted = 0
+        self.prompts = []
+
+    def count_tokens(self, prefix):
+        self.counted += 1
+        return SimpleNamespace(total_tokens=self.tokens)
+
+    def generate_content(self, prompt):
+        self.prompts.append(prompt)
+        return SimpleNamespace(text="{}")
+
+
+class FakeCachedContent:
+    created = []
+
+    def __init__(self, contents):
+        self.contents = contents
+        self.deleted = False
+        FakeCachedContent.created.append(self)
+
+    def delete(self):
+        self.deleted = True
+
+
+def fail_create(error):
+    def create(**kwargs):
+        raise error
+    return create
+
+
+@pytest.fixture
+def provider(monkeypatch):
+    """Fake Gemini with explicit caching: create() succeeds and returns a suffix-only model."""
+    model = FakeModel(prompt_cache.MIN_CACHE_TOKENS)
+    cached_model = FakeModel(0)
+    FakeCachedContent.created = []
+    monkeypatch.setattr(prompt_cache.genai, "GenerativeModel", lambda name: model)
+    monkeypatch.setattr(prompt_cache.genai.GenerativeModel, "from_cached_content",
+                        lambda cached_content: cached_model, raising=False)
+    monkeypatch.setattr(prompt_cache.caching.CachedContent, "create",
+                        lambda model, contents, ttl: FakeCachedContent(contents))
+    return SimpleNamespace(model=model, cached_model=cached_model)
+
+
+def test_cached_prefix_sends_only_suffix_and_is_deleted(provider):
+    cache = PrefixCache("gemini")
+    cache.generate(LONG_PREFIX, "resume one")
+    cache.generate(LONG_PREFIX, "resume two")
+
+    assert provider.cached_model.prompts == ["resume one", "resume two"]
+    assert provider.model.prompts == []
+    first, = FakeCachedContent.created
+    assert first.contents == [LONG_PREFIX]
+
+    key = prompt_cache._prefix_key("gemini", LONG_PREFIX)
+    cache._models[key].expires = datetime.datetime.now()
+    cache.generate(LONG_PREFIX, "resume three")
+    assert first.deleted
+
+    second = FakeCachedContent.created[-1]
+    assert second is not first and not second.deleted
+    cache.close()
+    assert second.deleted and not cache._models
+
+
+def test_concurrent_sessions_create_one_cache(provider, monkeypatch):
+    def slow_create(model, contents, ttl):
+        time.sleep(0.1)
+        return FakeCachedContent(contents)
+    monkeypatch.setattr(prompt_cache.caching.CachedContent, "create", slow_create)
+
+    cache = PrefixCache("gemini")
+    threads = [threading.Thread(target=cache.generate, args=(LONG_PREFIX, f"resume {i}")) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(FakeCachedContent.created) == 1
+    assert len(provider.cached_model.prompts) == 4
+
+
+def test_short_prefix_is_sent_in_full_without_provider_calls(provider, monkeypatch):
+    monkeypatch.setattr(prompt_cache.caching.CachedContent, "create", fail_create(AssertionError("create called")))
+
+    PrefixCache("gemini").generate("prefix ", "suffix")
+    assert provider.model.prompts == ["prefix suffix"]
+    assert provider.model.counted == 0
+
+
+def test_prefix_below_token_minimum_skips_create(provider, monkeypatch):
+    provider.model.tokens = prompt_cache.MIN_CACHE_TOKENS - 1
+    monkeypatch.setattr(prompt_cache.caching.CachedContent, "create", fail_create(AssertionError("create called")))
+
+    PrefixCache("gemini").generate(LONG_PREFIX, "suffix")
+    assert provider.model.prompts == [LONG_PREFIX + "suffix"]
+    assert provider.model.counted == 1
+
+
+def test_uncacheable_prefix_falls_back(provider, monkeypatch):
+    monkeypatch.setattr(prompt_cache.caching.CachedContent, "create", fail_create(api_exceptions.InvalidArgument("too small")))
+
+    PrefixCache("gemini").generate(LONG_PREFIX, "suffix")
+    assert provider.model.prompts == [LONG_PREFIX + "suffix"]
+
+
+def test_transient_bind_error_propagates_and_is_not_cached(provider, monkeypatch):
+    monkeypatch.setattr(prompt_cache.caching.CachedContent, "create", fail_create(api_exceptions.ServiceUnavailable("down")))
+
+    cache = PrefixCache("gemini")
+    with pytest.raises(api_exceptions.ServiceUnavailable):
+        cache.generate(LONG_PREFIX, "suffix")
+    assert not cache._models and not cache._binding